@@ -1,10 +1,22 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+from matplotlib.figure import Figure
+import plotly.express as px
 import numpy as np
+import hashlib
+import zipfile
 import streamlit as st
+import xlsxwriter
 from io import BytesIO
 
+# Grade scale, best to worst
+GRADE_ORDER = ['A+', 'A', 'B', 'C', 'D', 'F']
+
+# Define color palettes
+SUBJECT_PALETTE = {'Math': '#ff6b6b', 'Science': '#4ecdc4', 'English': '#45b7d1'}
+GRADE_PALETTE = {'A+': '#2ecc71', 'A': '#27ae60', 'B': '#f39c12', 'C': '#e67e22', 'D': '#e74c3c', 'F': '#c0392b'}
+# Grade counts are always indexed by GRADE_ORDER, so the bar colors are fixed
+GRADE_COLORS = [GRADE_PALETTE[grade] for grade in GRADE_ORDER]
+
 # Set page config
 st.set_page_config(
     page_title="Student Performance Analysis", 
@@ -23,6 +35,242 @@ def load_css(file_name):
     except FileNotFoundError:
         st.error("CSS file not found. Using default styling.")
 
+# Cached data helpers: Streamlit reruns the whole script on every widget
+# interaction, so anything derived from the uploaded file is memoized here.
+# They are keyed on df_hash, the MD5 of the uploaded bytes, and take the data as
+# underscore arguments so Streamlit does not re-hash the frame on every rerun.
+# max_entries bounds how many uploads are kept in memory
+@st.cache_data(show_spinner=False, max_entries=10)
+def load_df(df_hash, _file_bytes):
+    """
+    Load the uploaded CSV, cached on the file contents
+    """
+    # The columns used below get an explicit schema so the pyarrow reader skips
+    # type inference for them; any other uploaded columns are inferred and kept.
+    # Repeated labels are stored as categoricals so masks and groupbys work on
+    # integer codes
+    df = pd.read_csv(
+        BytesIO(_file_bytes),
+        engine='pyarrow',
+        dtype={
+            'Name': 'category',
+            'Class': 'category',
+            'Gender': 'category',
+            'Math': 'float64',
+            'Science': 'float64',
+            'English': 'float64',
+            'Total': 'float64',
+            'Percentage': 'float64',
+            'Grade': 'category'
+        }
+    )
+    # Scores are parsed as floats because a dtype cast after parsing is unchecked:
+    # int16 would truncate 85.5 and wrap 40000. Only columns that fit exactly are
+    # narrowed to int16
+    for col in ['Math', 'Science', 'English', 'Total']:
+        values = df[col].to_numpy()
+        if np.all((values == np.round(values)) & (values >= -32768) & (values <= 32767)):
+            df[col] = values.astype(np.int16)
+    return df
+
+def _tile_categorical(col, reps):
+    """
+    Repeat a categorical column by tiling its codes
+    """
+    return pd.Categorical.from_codes(np.tile(col.cat.codes.to_numpy(), reps), col.cat.categories)
+
+@st.cache_data(show_spinner=False, max_entries=10)
+def to_long_format(df_hash, _df):
+    """
+    Convert the subject score columns to long format
+    """
+    # Equivalent to df.melt() over the three subjects, but built straight from
+    # the numeric block instead of going through pandas' generic reshape
+    subjects = ['Math', 'Science', 'English']
+    scores = _df[subjects].to_numpy()
+    df_long = pd.DataFrame({
+        'Student_ID': np.tile(_df['Student_ID'].to_numpy(), len(subjects)),
+        'Name': _tile_categorical(_df['Name'], len(subjects)),
+        'Class': _tile_categorical(_df['Class'], len(subjects)),
+        'Gender': _tile_categorical(_df['Gender'], len(subjects)),
+        'Subject': pd.Categorical.from_codes(np.repeat(np.arange(len(subjects)), len(_df)), subjects),
+        'Score': scores.ravel(order='F')
+    })
+    return df_long
+
+@st.cache_data(show_spinner=False, max_entries=10)
+def compute_subject_corr(df_hash, _df):
+    """
+    Correlation matrix between the subject scores
+    """
+    subjects = ['Math', 'Science', 'English']
+    scores = _df[subjects].to_numpy(dtype=np.float64)
+    if np.isnan(scores).any():
+        # np.corrcoef has no NaN handling; pandas skips missing scores pairwise
+        return _df[subjects].corr()
+    # A subject with constant scores has no correlation; leave it NaN quietly as .corr() does
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = np.corrcoef(scores, rowvar=False)
+    return pd.DataFrame(corr, index=subjects, columns=subjects)
+
+@st.cache_data(show_spinner=False, max_entries=10)
+def compute_grade_counts(df_hash, _df):
+    """
+    Number of students per grade, from best to worst
+    """
+    # Codes are remapped onto GRADE_ORDER only here, so the data itself keeps any
+    # grade outside the scale; those are coded -1 and not counted
+    codes = _df['Grade'].cat.set_categories(GRADE_ORDER).cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(GRADE_ORDER))
+    return pd.Series(counts, index=GRADE_ORDER)
+
+@st.cache_data(show_spinner=False, max_entries=10)
+def compute_subject_avgs(df_hash, _df):
+    """
+    Average score per subject
+    """
+    return _df[['Math', 'Science', 'English']].mean().round(2)
+
+@st.cache_data(show_spinner=False, max_entries=10)
+def compute_class_performance(df_hash, _df):
+    """
+    Average percentage and number of students per class, in a single groupby pass
+    """
+    class_performance = _df.groupby('Class', observed=True)['Percentage'].agg(['mean', 'count']).round(2)
+    class_performance.columns = ['Average Percentage', 'Number of Students']
+    return class_performance
+
+@st.cache_data(show_spinner=False, max_entries=10)
+def compute_class_avg(df_hash, _df):
+    """
+    Average score per subject, in the same layout as the long format data
+    """
+    # Column means on the wide frame give the same numbers as grouping the
+    # long frame by subject, without building a group index over 3N rows
+    subjects = ['Math', 'Science', 'English']
+    return pd.DataFrame({'Subject': subjects, 'Score': _df[subjects].mean().to_numpy()})
+
+def _smallest_positions(values, n):
+    """
+    Row positions of the n smallest values, in ascending order
+    """
+    # Mirrors nsmallest/nlargest(keep='first'): the smallest non-NaN values come
+    # first, then NaN rows in row order fill up any remaining places
+    missing = np.isnan(values)
+    valid = np.flatnonzero(~missing)
+    k = min(n, len(valid))
+    if k > 0:
+        # Partition finds the k-th smallest value in linear time. Ties at that
+        # value are then resolved by row order
+        kth = values[valid[np.argpartition(values[valid], k - 1)[:k]]].max()
+        cand = valid[values[valid] <= kth]
+        valid = cand[np.argsort(values[cand], kind='stable')][:k]
+    else:
+        valid = valid[:0]
+    return np.concatenate([valid, np.flatnonzero(missing)])[:max(n, 0)]
+
+@st.cache_data(show_spinner=False, max_entries=10)
+def get_top_students(df_hash, _df, n=5):
+    """
+    Highest scoring students by percentage
+    """
+    idx = _smallest_positions(-_df['Percentage'].to_numpy(), n)
+    return _df.iloc[idx][['Name', 'Class', 'Math', 'Science', 'English', 'Total', 'Percentage', 'Grade']]
+
+@st.cache_data(show_spinner=False, max_entries=10)
+def get_bottom_students(df_hash, _df, n=5):
+    """
+    Lowest scoring students by percentage
+    """
+    idx = _smallest_positions(_df['Percentage'].to_numpy(), n)
+    return _df.iloc[idx][['Name', 'Class', 'Math', 'Science', 'English', 'Total', 'Percentage', 'Grade']]
+
+@st.cache_resource(show_spinner=False, max_entries=10)
+def build_name_index(df_hash, _df):
+    """
+    Map each student name to the row of its first occurrence
+    """
+    names = _df['Name'].to_numpy()
+    # Built in reverse so the first occurrence of a repeated name wins
+    return dict(zip(names[::-1], np.arange(len(names))[::-1]))
+
+@st.cache_data(show_spinner=False, max_entries=100)
+def render_profile_png(student_name, df_hash, _student_data, _class_avg):
+    """
+    Render the profile chart for a student to PNG, cached per student and dataset
+    """
+    # Only the PNG bytes are cached, so sessions never share a Figure. Figure is
+    # used directly rather than through pyplot, which keeps global state
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    
+    # Plot class average as bars
+    bars = ax.bar(_class_avg['Subject'], _class_avg['Score'], alpha=0.7, 
+                 color='lightgrey', label='Class Average')
+    
+    # Plot student performance as line
+    line = ax.plot(_student_data['Subject'], _student_data['Score'], 
+                  marker='o', linewidth=2.5, markersize=8, 
+                  label=student_name, color='#ff6b6b')
+    
+    # Add value labels
+    ax.bar_label(bars, fmt='%.1f', padding=3, fontsize=10)
+    
+    for i, (subject, score) in enumerate(zip(_student_data['Subject'], _student_data['Score'])):
+        ax.text(i, score + 2, f'{score}', ha='center', va='bottom', fontsize=10, fontweight='bold')
+    
+    ax.legend()
+    ax.set_title(f'Performance Profile: {student_name} vs Class Average')
+    ax.set_ylabel('Score')
+    ax.set_ylim(0, 110)
+    ax.grid(True, alpha=0.3)
+    
+    # Same savefig settings st.pyplot uses
+    output = BytesIO()
+    fig.savefig(output, format='png', bbox_inches='tight', dpi=200)
+    return output.getvalue()
+
+def _write_sheet(workbook, sheet_name, frame, header_format):
+    """
+    Write a DataFrame to a new worksheet, one row at a time
+    """
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, list(frame.columns), header_format)
+    for row_num, row in enumerate(frame.itertuples(index=False, name=None), start=1):
+        # NaN != NaN; missing values are left blank as DataFrame.to_excel does
+        worksheet.write_row(row_num, 0, [None if value != value else value for value in row])
+
+@st.cache_data(show_spinner=False, max_entries=10)
+def build_excel_report(df_hash, _df, _top_students, _bottom_students, _class_performance):
+    """
+    Build the Excel analysis report, cached per dataset
+    """
+    output = BytesIO()
+    # In constant_memory mode each row is flushed as soon as the next one starts,
+    # so sheets are written row by row here rather than with DataFrame.to_excel,
+    # which fills cells column by column
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    _write_sheet(workbook, 'Raw Data', _df, header_format)
+    _write_sheet(workbook, 'Top Performers', _top_students, header_format)
+    _write_sheet(workbook, 'Bottom Performers', _bottom_students, header_format)
+    _write_sheet(workbook, 'Class Performance', _class_performance.reset_index(), header_format)
+    workbook.close()
+    return output.getvalue()
+
+@st.cache_data(show_spinner=False, max_entries=10)
+def build_csv_bundle(df_hash, _df, _top_students, _bottom_students, _class_performance):
+    """
+    Build a ZIP of the report sheets as CSV files, cached per dataset
+    """
+    output = BytesIO()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as bundle:
+        bundle.writestr('raw_data.csv', _df.to_csv(index=False))
+        bundle.writestr('top_performers.csv', _top_students.to_csv(index=False))
+        bundle.writestr('bottom_performers.csv', _bottom_students.to_csv(index=False))
+        bundle.writestr('class_performance.csv', _class_performance.to_csv())
+    return output.getvalue()
+
 # Load external CSS
 load_css("style.css")
 
@@ -42,16 +290,19 @@ with st.container():
 
 if uploaded_file is not None:
     # Load data
-    df = pd.read_csv(uploaded_file)
+    file_bytes = uploaded_file.getvalue()
+    df_hash = hashlib.md5(file_bytes).hexdigest()
+    df = load_df(df_hash, file_bytes)
     
     # Display basic info
     st.markdown('<div class="sub-header">Dataset Overview</div>', unsafe_allow_html=True)
+    class_performance = compute_class_performance(df_hash, df)
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         st.markdown('<div class="metric-card"><div class="metric-value">' + str(len(df)) + '</div><div class="metric-label">Total Students</div></div>', unsafe_allow_html=True)
     with col2:
-        st.markdown('<div class="metric-card"><div class="metric-value">' + str(df['Class'].nunique()) + '</div><div class="metric-label">Number of Classes</div></div>', unsafe_allow_html=True)
+        st.markdown('<div class="metric-card"><div class="metric-value">' + str(len(class_performance)) + '</div><div class="metric-label">Number of Classes</div></div>', unsafe_allow_html=True)
     with col3:
         st.markdown('<div class="metric-card"><div class="metric-value">' + str(len(df.columns)) + '</div><div class="metric-label">Data Columns</div></div>', unsafe_allow_html=True)
     with col4:
@@ -63,16 +314,7 @@ if uploaded_file is not None:
         st.dataframe(df)
     
     # Convert to long format
-    df_long = df.melt(
-        id_vars=['Student_ID', 'Name', 'Class', 'Gender'],
-        value_vars=['Math', 'Science', 'English'],
-        var_name='Subject',
-        value_name='Score'
-    )
-    
-    # Define color palettes
-    subject_palette = {'Math': '#ff6b6b', 'Science': '#4ecdc4', 'English': '#45b7d1'}
-    grade_palette = {'A+': '#2ecc71', 'A': '#27ae60', 'B': '#f39c12', 'C': '#e67e22', 'D': '#e74c3c', 'F': '#c0392b'}
+    df_long = to_long_format(df_hash, df)
     
     # Visualizations
     st.markdown('<div class="sub-header">Performance Analysis</div>', unsafe_allow_html=True)
@@ -81,45 +323,37 @@ if uploaded_file is not None:
     
     with col1:
         st.markdown("##### Score Distribution by Subject")
-        fig, ax = plt.subplots(figsize=(8, 6))
-        sns.boxplot(data=df_long, x='Subject', y='Score', hue='Subject', palette=subject_palette, legend=False, ax=ax)
-        ax.set_title('Score Distribution by Subject')
-        st.pyplot(fig)
+        fig = px.box(df_long, x='Subject', y='Score', color='Subject', color_discrete_map=SUBJECT_PALETTE,
+                     title='Score Distribution by Subject')
+        fig.update_layout(showlegend=False)
+        st.plotly_chart(fig)
         
         st.markdown("##### Performance by Gender")
-        fig, ax = plt.subplots(figsize=(8, 6))
-        sns.boxplot(data=df_long, x='Subject', y='Score', hue='Gender', palette='pastel', ax=ax)
-        ax.set_title('Performance by Gender')
-        plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-        st.pyplot(fig)
+        fig = px.box(df_long, x='Subject', y='Score', color='Gender', color_discrete_sequence=px.colors.qualitative.Pastel,
+                     title='Performance by Gender')
+        st.plotly_chart(fig)
     
     with col2:
         st.markdown("##### Subject Correlation Heatmap")
-        fig, ax = plt.subplots(figsize=(8, 6))
-        subject_corr = df[['Math', 'Science', 'English']].corr()
-        sns.heatmap(subject_corr, annot=True, cmap='RdYlGn', center=0, square=True, fmt='.2f', ax=ax)
-        ax.set_title('Subject Correlation Heatmap')
-        st.pyplot(fig)
+        subject_corr = compute_subject_corr(df_hash, df)
+        fig = px.imshow(subject_corr, text_auto='.2f', color_continuous_scale='RdYlGn', zmin=-1, zmax=1,
+                        title='Subject Correlation Heatmap')
+        st.plotly_chart(fig)
         
         st.markdown("##### Grade Distribution")
-        fig, ax = plt.subplots(figsize=(8, 6))
-        grade_order = ['A+', 'A', 'B', 'C', 'D', 'F']
-        grade_counts = df['Grade'].value_counts().reindex(grade_order)
-        colors = [grade_palette[grade] for grade in grade_counts.index]
-        sns.barplot(x=grade_counts.index, y=grade_counts.values, hue=grade_counts.index, palette=colors, legend=False, ax=ax)
-        ax.set_title('Grade Distribution')
-        ax.set_xlabel('Grade')
-        ax.set_ylabel('Number of Students')
-        for i, count in enumerate(grade_counts.values):
-            ax.text(i, count + 0.1, str(count), ha='center', va='bottom')
-        st.pyplot(fig)
+        grade_counts = compute_grade_counts(df_hash, df)
+        fig = px.bar(x=grade_counts.index, y=grade_counts.values, color=grade_counts.index,
+                     color_discrete_sequence=GRADE_COLORS, text_auto=True, title='Grade Distribution',
+                     labels={'x': 'Grade', 'y': 'Number of Students'})
+        fig.update_layout(showlegend=False)
+        st.plotly_chart(fig)
     
     # Detailed Analysis
     st.markdown('<div class="sub-header">Detailed Analysis</div>', unsafe_allow_html=True)
     
     # Overall statistics
     st.markdown("##### Subject Averages")
-    subject_avgs = df[['Math', 'Science', 'English']].mean().round(2)
+    subject_avgs = compute_subject_avgs(df_hash, df)
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -134,48 +368,28 @@ if uploaded_file is not None:
     
     with col1:
         st.markdown("##### 🏆 Top 5 Performers")
-        top_students = df.nlargest(5, 'Percentage')[['Name', 'Class', 'Math', 'Science', 'English', 'Total', 'Percentage', 'Grade']]
+        top_students = get_top_students(df_hash, df)
         st.dataframe(top_students)
     
     with col2:
         st.markdown("##### 📊 Bottom 5 Performers")
-        bottom_students = df.nsmallest(5, 'Percentage')[['Name', 'Class', 'Math', 'Science', 'English', 'Total', 'Percentage', 'Grade']]
+        bottom_students = get_bottom_students(df_hash, df)
         st.dataframe(bottom_students)
     
     # Student selector for individual profiles
     st.markdown("##### 👤 Individual Student Profile")
+    class_avg = compute_class_avg(df_hash, df)
+    name_to_idx = build_name_index(df_hash, df)
     student_names = df['Name'].tolist()
     selected_student = st.selectbox("Select a student to view their profile:", student_names, label_visibility="collapsed")
     
     if selected_student:
-        student_data = df_long[df_long['Name'] == selected_student]
-        class_avg = df_long.groupby('Subject')['Score'].mean().reset_index()
-        student_info = df[df['Name'] == selected_student].iloc[0]
-        
-        fig, ax = plt.subplots(figsize=(10, 6))
+        row = name_to_idx[selected_student]
+        student_info = df.iloc[row]
+        # df_long stacks the subjects block by block, so a student's scores sit one frame length apart
+        student_data = df_long.iloc[row::len(df)]
         
-        # Plot class average as bars
-        bars = ax.bar(class_avg['Subject'], class_avg['Score'], alpha=0.7, 
-                     color='lightgrey', label='Class Average')
-        
-        # Plot student performance as line
-        line = ax.plot(student_data['Subject'], student_data['Score'], 
-                      marker='o', linewidth=2.5, markersize=8, 
-                      label=selected_student, color='#ff6b6b')
-        
-        # Add value labels
-        for i, (subject, avg_score) in enumerate(zip(class_avg['Subject'], class_avg['Score'])):
-            ax.text(i, avg_score + 2, f'{avg_score:.1f}', ha='center', va='bottom', fontsize=10)
-        
-        for i, (subject, score) in enumerate(zip(student_data['Subject'], student_data['Score'])):
-            ax.text(i, score + 2, f'{score}', ha='center', va='bottom', fontsize=10, fontweight='bold')
-        
-        ax.legend()
-        ax.set_title(f'Performance Profile: {selected_student} vs Class Average')
-        ax.set_ylabel('Score')
-        ax.set_ylim(0, 110)
-        ax.grid(True, alpha=0.3)
-        st.pyplot(fig)
+        st.image(render_profile_png(selected_student, df_hash, student_data, class_avg), width='stretch')
         
         # Display student details in a card
         st.markdown(f'<div class="student-card">', unsafe_allow_html=True)
@@ -203,16 +417,7 @@ if uploaded_file is not None:
     st.markdown('<div class="sub-header">Download Report</div>', unsafe_allow_html=True)
     
     # Create Excel file in memory
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, sheet_name='Raw Data', index=False)
-        top_students.to_excel(writer, sheet_name='Top Performers', index=False)
-        bottom_students.to_excel(writer, sheet_name='Bottom Performers', index=False)
-        class_performance = df.groupby('Class')['Percentage'].agg(['mean', 'count']).round(2)
-        class_performance.columns = ['Average Percentage', 'Number of Students']
-        class_performance.to_excel(writer, sheet_name='Class Performance')
-    
-    output.seek(0)
+    output = build_excel_report(df_hash, df, top_students, bottom_students, class_performance)
     
     st.download_button(
         label="📥 Download Full Analysis Report (Excel)",
@@ -220,6 +425,14 @@ if uploaded_file is not None:
         file_name="student_performance_analysis.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
+    
+    # The same sheets as plain CSV files, much faster to build for large datasets
+    st.download_button(
+        label="📥 Download Full Analysis Report (CSV ZIP)",
+        data=build_csv_bundle(df_hash, df, top_students, bottom_students, class_performance),
+        file_name="student_performance_analysis.zip",
+        mime="application/zip"
+    )
 
 else:
     st.info("📝 Please upload a CSV file to begin the analysis. Use the sample format below.")